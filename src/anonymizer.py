@@ -2,11 +2,22 @@
 
 from __future__ import annotations
 
+import functools
+import hashlib
 import re
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, field
 from typing import Protocol
 
 from presidio_analyzer import AnalyzerEngine
 
+try:
+    import ahocorasick
+except ImportError:  # pragma: no cover - C extension unavailable on this platform
+    ahocorasick = None
+
 
 class ReplacementProvider(Protocol):
     """Protocol describing callables that generate PII replacement mappings."""
@@ -15,13 +26,20 @@ class ReplacementProvider(Protocol):
         """Return a dictionary mapping original PII to anonymized replacements."""
 
 
+@functools.lru_cache(maxsize=1)
+def _get_analyzer() -> AnalyzerEngine:
+    """Return a process-wide AnalyzerEngine, loading the spaCy model only once."""
+    return AnalyzerEngine()
+
+
+@dataclass(slots=True)
 class PresidioAnonymizer:
     """Presidio-based anonymizer for PII detection with generic replacements."""
 
-    def __init__(self, entity_types: list[str] | None = None) -> None:
-        self.analyzer = AnalyzerEngine()
-        # Entity types to detect (None means detect all)
-        self.entity_types = entity_types
+    # Entity types to detect (None means detect all)
+    entity_types: list[str] | None = None
+    # Shared across instances; entity filtering happens per analyze() call
+    analyzer: AnalyzerEngine = field(default_factory=_get_analyzer)
 
     def __call__(self, text: str, *, context: str | None = None) -> dict[str, str]:
         """Generate PII replacement mappings for the given text.
@@ -46,38 +64,184 @@ class PresidioAnonymizer:
         if not analyzer_results:
             return {}
 
-        # Build replacement mappings using Presidio's generic format
-        replacements = {}
-        for result in analyzer_results:
-            original_text = text[result.start : result.end]
-            # Use Presidio's generic replacement format: <ENTITY_TYPE>
-            replacement_text = f"<{result.entity_type}>"
-            replacements[original_text] = replacement_text
+        # Build replacement mappings using Presidio's generic format: <ENTITY_TYPE>;
+        # when the same text is detected more than once, the last result wins
+        return {
+            text[result.start : result.end]: f"<{result.entity_type}>"
+            for result in analyzer_results
+        }
+
+
+class CachedReplacementProvider:
+    """Memoize replacement mappings for text that has already been analyzed.
+
+    Headers, signatures and boilerplate footers repeat across parts and across
+    emails; an exact-match cache returns their mappings without re-running
+    the analyzer. Only exact matches are reused - near-duplicate text may
+    contain different PII, so similarity-based lookups would be unsafe.
+    """
+
+    def __init__(self, provider: ReplacementProvider, maxsize: int = 4096) -> None:
+        self._provider = provider
+        self._maxsize = maxsize
+        self._cache: OrderedDict[bytes, dict[str, str]] = OrderedDict()
+        # The provider is shared across Streamlit sessions; the analyzer itself
+        # runs outside the lock so concurrent misses are not serialized
+        self._lock = threading.Lock()
+
+    def __call__(self, text: str, *, context: str | None = None) -> dict[str, str]:
+        """Return cached replacements for the text, analyzing it on a miss."""
+        # A 16-byte BLAKE2b digest is cheaper to compute and store than SHA-256 hex
+        key = hashlib.blake2b(
+            f"{context or ''}\0{text}".encode("utf-8"), digest_size=16
+        ).digest()
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return dict(cached)
+
+        replacements = self._provider(text, context=context)
+        with self._lock:
+            self._cache[key] = dict(replacements)
+            if len(self._cache) > self._maxsize:
+                # Evict the least recently used entry
+                self._cache.popitem(last=False)
 
         return replacements
 
 
-def apply_replacements(text: str, replacements: dict[str, str]) -> str:
-    """Apply replacement mappings to text, preserving structure and formatting.
+@functools.lru_cache(maxsize=32)
+def _compile_matcher(
+    items: frozenset[tuple[str, str]],
+) -> Callable[[str], list[tuple[int, int, str]]]:
+    """Build a single-pass match finder for a set of replacements.
+
+    Uses an Aho-Corasick automaton when ``pyahocorasick`` is installed and a
+    single alternation regex otherwise. Both scan the text once and prefer the
+    longest key at the leftmost match position.
 
-    Replacements are applied in order of longest key first to avoid partial replacements.
+    Returns:
+        A function returning the non-overlapping ``(start, end, replacement)``
+        matches in a text, in order
     """
-    if not replacements or not text:
-        return text
+    lookup = {original: replacement for original, replacement in items if original}
+    if not lookup:
+        return lambda text: []
+
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for original, replacement in lookup.items():
+            automaton.add_word(original, (len(original), replacement))
+        automaton.make_automaton()
+
+        def find(text: str) -> list[tuple[int, int, str]]:
+            # Order matches by start, longest first, then keep the leftmost
+            # non-overlapping ones (``iter_long`` can drop trailing matches)
+            matches = sorted(
+                (end - length + 1, -length, replacement)
+                for end, (length, replacement) in automaton.iter(text)
+            )
+            found = []
+            cursor = 0
+            for start, negative_length, replacement in matches:
+                if start < cursor:
+                    continue
+                cursor = start - negative_length
+                found.append((start, cursor, replacement))
+            return found
+
+        return find
+
+    # Longest keys first so the alternation prefers the longest match
+    pattern = re.compile(
+        "|".join(re.escape(key) for key in sorted(lookup, key=len, reverse=True))
+    )
+    return lambda text: [
+        (match.start(), match.end(), lookup[match.group(0)])
+        for match in pattern.finditer(text)
+    ]
+
 
-    # Sort by length (longest first) to avoid partial replacements
-    sorted_items = sorted(replacements.items(), key=lambda x: len(x[0]), reverse=True)
+@functools.lru_cache(maxsize=32)
+def _compile_replacements(
+    items: frozenset[tuple[str, str]],
+) -> Callable[[str], str]:
+    """Build a single-pass substitution function for a set of replacements."""
+    lookup = {original: replacement for original, replacement in items if original}
+    if not lookup:
+        return lambda text: text
 
-    result = text
+    if len(lookup) == 1:
+        # A single literal needs no automaton; str.replace scans the same way
+        ((original, replacement),) = lookup.items()
+        return lambda text: text.replace(original, replacement)
 
-    for original, replacement in sorted_items:
-        if original in result:
-            # Use regex with word boundaries for more accurate replacement
-            # Escape special regex characters in the original string
-            pattern = re.escape(original)
-            result = re.sub(pattern, replacement, result)
+    find = _compile_matcher(items)
 
-    return result
+    def substitute(text: str) -> str:
+        matches = find(text)
+        if not matches:
+            return text
+        pieces = []
+        cursor = 0
+        for start, end, replacement in matches:
+            pieces.append(text[cursor:start])
+            pieces.append(replacement)
+            cursor = end
+        pieces.append(text[cursor:])
+        return "".join(pieces)
+
+    return substitute
+
+
+class ReplacementPlan:
+    """A replacement mapping compiled once for reuse across many texts.
+
+    Build one per email or document and pass it to ``apply_replacements`` in
+    place of the dict, so the matcher is not looked up again for every header,
+    body or text run.
+    """
+
+    __slots__ = ("replacements", "_items", "_substitute")
+
+    def __init__(self, replacements: dict[str, str]) -> None:
+        self.replacements = replacements
+        self._items = frozenset(replacements.items())
+        self._substitute = _compile_replacements(self._items)
+
+    def __bool__(self) -> bool:
+        return bool(self.replacements)
+
+    def apply(self, text: str) -> str:
+        """Return the text with all replacements applied."""
+        return self._substitute(text) if text else text
+
+    def find(self, text: str) -> list[tuple[int, int, str]]:
+        """Return the ``(start, end, replacement)`` matches in the text, in order.
+
+        Matches never overlap and follow the same longest-key-wins rule as
+        ``apply``.
+        """
+        return _compile_matcher(self._items)(text) if text else []
+
+
+def apply_replacements(
+    text: str, replacements: dict[str, str] | ReplacementPlan
+) -> str:
+    """Apply replacement mappings to text, preserving structure and formatting.
+
+    All keys are matched in a single scan of the text; where keys overlap the
+    longest one wins, so partial replacements cannot occur and replacement
+    values are never rewritten by other keys.
+    """
+    if not replacements or not text:
+        return text
+
+    if not isinstance(replacements, ReplacementPlan):
+        replacements = ReplacementPlan(replacements)
+    return replacements.apply(text)
 
 
 def build_replacement_provider(
@@ -85,8 +249,10 @@ def build_replacement_provider(
 ) -> ReplacementProvider:
     """Return a callable that generates replacement mappings using Presidio.
 
+    Results are memoized per text so repeated content is only analyzed once.
+
     Args:
         entity_types: List of entity types to detect (e.g., ["PERSON", "EMAIL_ADDRESS"]).
                      If None, all entity types will be detected.
     """
-    return PresidioAnonymizer(entity_types=entity_types)
+    return CachedReplacementProvider(PresidioAnonymizer(entity_types=entity_types))
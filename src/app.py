@@ -2,11 +2,57 @@
 
 from __future__ import annotations
 
-import pandas as pd
 import streamlit as st
 
 from .anonymizer import build_replacement_provider
-from .processors.email_processor import anonymize_eml
+from .processors.email_processor import EmailProcessor
+
+
+# Entity types offered in the UI with their descriptions
+_ENTITY_DESCRIPTIONS = {
+    "PERSON": "A person's full name (first, middle, last etc)",
+    "EMAIL_ADDRESS": "An email address (RFC-822 style)",
+    "PHONE_NUMBER": "A telephone number",
+    "LOCATION": "Geographic locations (cities/provinces/countries/regions)",
+    "CREDIT_CARD": "A credit card number (12-19 digits)",
+    "US_SSN": "US Social Security Number (9 digits)",
+    "DATE_TIME": "Absolute or relative dates/times",
+    "URL": "A URL pointing to a resource on the Internet",
+    "IP_ADDRESS": "An IP address (IPv4 or IPv6)",
+    "CRYPTO": "Cryptocurrency wallet number (Bitcoin addresses)",
+    "IBAN_CODE": "International Bank Account Number (IBAN)",
+    "NRP": "Nationality, religious or political group",
+    "MEDICAL_LICENSE": "A medical licence number",
+    "US_BANK_NUMBER": "A US bank account number (8-17 digits)",
+    "US_DRIVER_LICENSE": "A US driver's licence number",
+    "US_ITIN": "US Individual Taxpayer ID (9 digits, starts with 9)",
+    "US_PASSPORT": "US passport number (9 digits)",
+}
+
+# Default selections (most common PII types)
+_DEFAULT_SELECTED = (
+    "PERSON",
+    "EMAIL_ADDRESS",
+    "PHONE_NUMBER",
+    "LOCATION",
+    "US_SSN",
+    "CREDIT_CARD",
+)
+
+
+# Bounded, as each entity selection keeps its own processor and cache alive
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _get_email_processor(entity_types: tuple[str, ...] | None) -> EmailProcessor:
+    """Return an email processor for the entity selection, reused across reruns.
+
+    Keeping the processor alive preserves the loaded analyzer and its
+    replacement cache between uploads.
+    """
+    return EmailProcessor(
+        build_replacement_provider(
+            entity_types=list(entity_types) if entity_types else None
+        )
+    )
 
 
 def build_app() -> None:
@@ -31,107 +77,17 @@ def build_app() -> None:
         "Email file", type=["eml"], accept_multiple_files=False
     )
 
-    # Entity type selection table
+    # Entity type selection
     st.subheader("Select Entity Types to Anonymize")
 
-    # Define entity types with descriptions
-    entity_data = [
-        {
-            "Entity Type": "PERSON",
-            "Description": "A person's full name (first, middle, last etc)",
-        },
-        {
-            "Entity Type": "EMAIL_ADDRESS",
-            "Description": "An email address (RFC-822 style)",
-        },
-        {"Entity Type": "PHONE_NUMBER", "Description": "A telephone number"},
-        {
-            "Entity Type": "LOCATION",
-            "Description": "Geographic locations (cities/provinces/countries/regions)",
-        },
-        {
-            "Entity Type": "CREDIT_CARD",
-            "Description": "A credit card number (12-19 digits)",
-        },
-        {
-            "Entity Type": "US_SSN",
-            "Description": "US Social Security Number (9 digits)",
-        },
-        {"Entity Type": "DATE_TIME", "Description": "Absolute or relative dates/times"},
-        {
-            "Entity Type": "URL",
-            "Description": "A URL pointing to a resource on the Internet",
-        },
-        {"Entity Type": "IP_ADDRESS", "Description": "An IP address (IPv4 or IPv6)"},
-        {
-            "Entity Type": "CRYPTO",
-            "Description": "Cryptocurrency wallet number (Bitcoin addresses)",
-        },
-        {
-            "Entity Type": "IBAN_CODE",
-            "Description": "International Bank Account Number (IBAN)",
-        },
-        {
-            "Entity Type": "NRP",
-            "Description": "Nationality, religious or political group",
-        },
-        {"Entity Type": "MEDICAL_LICENSE", "Description": "A medical licence number"},
-        {
-            "Entity Type": "US_BANK_NUMBER",
-            "Description": "A US bank account number (8-17 digits)",
-        },
-        {
-            "Entity Type": "US_DRIVER_LICENSE",
-            "Description": "A US driver's licence number",
-        },
-        {
-            "Entity Type": "US_ITIN",
-            "Description": "US Individual Taxpayer ID (9 digits, starts with 9)",
-        },
-        {"Entity Type": "US_PASSPORT", "Description": "US passport number (9 digits)"},
-    ]
-
-    # Default selections (most common PII types)
-    default_selected = {
-        "PERSON",
-        "EMAIL_ADDRESS",
-        "PHONE_NUMBER",
-        "LOCATION",
-        "US_SSN",
-        "CREDIT_CARD",
-    }
-
-    # Add checkboxes to each row
-    df = pd.DataFrame(entity_data)
-    df.insert(0, "Select", df["Entity Type"].isin(default_selected))
-
-    # Display as data editor with checkboxes
-    edited_df = st.data_editor(
-        df,
-        column_config={
-            "Select": st.column_config.CheckboxColumn(
-                "Select",
-                help="Check to anonymize this entity type",
-                default=False,
-            ),
-            "Entity Type": st.column_config.TextColumn(
-                "Entity Type",
-                disabled=True,
-            ),
-            "Description": st.column_config.TextColumn(
-                "Description",
-                disabled=True,
-                width="large",
-            ),
-        },
-        disabled=["Entity Type", "Description"],
-        hide_index=True,
-        use_container_width=True,
+    selected_entities = st.multiselect(
+        "Entity types",
+        options=list(_ENTITY_DESCRIPTIONS),
+        default=list(_DEFAULT_SELECTED),
+        format_func=lambda entity: f"{entity} — {_ENTITY_DESCRIPTIONS[entity]}",
+        help="Choose which entity types to anonymize",
     )
 
-    # Extract selected entity types
-    selected_entities = edited_df[edited_df["Select"]]["Entity Type"].tolist()
-
     # Show selection summary
     if selected_entities:
         st.info(
@@ -146,24 +102,22 @@ def build_app() -> None:
 
     if st.button("Anonymize", type="primary"):
         # Use None if no entities selected (will detect all types)
-        entity_types_to_use = selected_entities if selected_entities else None
+        entity_types_to_use = tuple(sorted(selected_entities)) or None
 
         try:
             with st.spinner("Initializing Presidio analyzer..."):
-                replacement_provider = build_replacement_provider(
-                    entity_types=entity_types_to_use
-                )
+                processor = _get_email_processor(entity_types_to_use)
 
             with st.spinner("Analyzing and anonymizing email and attachments..."):
-                anonymized_bytes = anonymize_eml(
-                    uploaded_file.getvalue(), replacement_provider
-                )
+                # Stream the upload into the parser rather than copying it
+                uploaded_file.seek(0)
+                anonymized_bytes = processor.anonymize(uploaded_file)
 
             st.success("✅ Email anonymized successfully!")
 
             # Show verification info prominently
             st.info(
-                f"📊 **Verification:** Original size: {len(uploaded_file.getvalue())} bytes → Anonymized size: {len(anonymized_bytes)} bytes"
+                f"📊 **Verification:** Original size: {uploaded_file.size} bytes → Anonymized size: {len(anonymized_bytes)} bytes"
             )
 
             # Show debugging info
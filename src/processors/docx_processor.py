@@ -3,130 +3,216 @@
 from __future__ import annotations
 
 import io
-import uuid
+import posixpath
+import secrets
+import zipfile
+from urllib.parse import unquote
 
-from docx import Document
-from docx.document import Document as DocumentType
-from docx.table import Table
-from docx.text.paragraph import Paragraph
+from lxml import etree
 
 from .types import AnonymizedAttachment
-from ..anonymizer import ReplacementProvider, apply_replacements
+from ..anonymizer import ReplacementPlan, ReplacementProvider, apply_replacements
+
+_WORD_NAMESPACE = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_PARAGRAPH_TAG = f"{{{_WORD_NAMESPACE}}}p"
+_TEXT_TAG = f"{{{_WORD_NAMESPACE}}}t"
+_TAB_TAG = f"{{{_WORD_NAMESPACE}}}tab"
+_BREAK_TAG = f"{{{_WORD_NAMESPACE}}}br"
+
+_CONTENT_TYPES_PART = "[Content_Types].xml"
+_CONTENT_TYPES_NAMESPACE = (
+    "http://schemas.openxmlformats.org/package/2006/content-types"
+)
+_DEFAULT_TAG = f"{{{_CONTENT_TYPES_NAMESPACE}}}Default"
+_OVERRIDE_TAG = f"{{{_CONTENT_TYPES_NAMESPACE}}}Override"
+
+# Content types of the package parts holding visible text: the main body
+# (documents, templates and their macro-enabled variants), headers and footers
+_TEXT_PART_CONTENT_TYPES = frozenset(
+    {
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml",
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.template.main+xml",
+        "application/vnd.ms-word.document.macroEnabled.main+xml",
+        "application/vnd.ms-word.template.macroEnabledTemplate.main+xml",
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.header+xml",
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.footer+xml",
+    }
+)
 
 
 class DocxProcessor:
-    """Anonymize Microsoft Word ``.docx`` files using Presidio."""
+    """Anonymize Microsoft Word ``.docx`` files using Presidio.
+
+    The package is edited directly: the body, header and footer XML parts are
+    parsed once with lxml, replacements are written into their ``<w:t>`` text
+    nodes, and every other part is copied over unchanged.
+    """
 
     def __init__(self, replacement_provider: ReplacementProvider) -> None:
         self._replacement_provider = replacement_provider
 
-    def anonymize(self, filename: str, payload: bytes) -> AnonymizedAttachment:
-        """Anonymize DOCX content while preserving all formatting and metadata."""
-        document = Document(io.BytesIO(payload))
-
-        # Extract all text from the document to analyze with Presidio
-        full_text = self._extract_all_text(document)
-
-        # Use Presidio to generate replacements
-        replacements = self._replacement_provider(full_text, context="DOCX attachment")
-
-        # Single pass through all document elements
-        self._apply_replacements_to_document(document, replacements)
-
-        # Save with all metadata preserved
-        buffer = io.BytesIO()
-        document.save(buffer)
+    def extract_text(self, payload: bytes) -> str:
+        """Extract all document text for PII analysis."""
+        with zipfile.ZipFile(io.BytesIO(payload)) as archive:
+            parts = self._parse_text_parts(archive)
+        return self._extract_all_text(parts)
+
+    def anonymize(
+        self,
+        filename: str,
+        payload: bytes,
+        replacements: dict[str, str] | ReplacementPlan | None = None,
+    ) -> AnonymizedAttachment:
+        """Anonymize DOCX content while preserving all formatting and metadata.
+
+        Args:
+            filename: Original attachment filename
+            payload: Raw DOCX bytes
+            replacements: Precomputed replacement mappings, either as a dict or
+                         an already compiled plan. When omitted, the document
+                         text is analyzed with the replacement provider.
+        """
+        with zipfile.ZipFile(io.BytesIO(payload)) as archive:
+            # Parse each text-bearing part once; the same trees are edited in place
+            parts = self._parse_text_parts(archive)
+
+            if replacements is None:
+                # Analyze the text of all parts in a single provider call
+                full_text = self._extract_all_text(parts)
+                replacements = self._replacement_provider(
+                    full_text, context="DOCX attachment"
+                )
+
+            # Only re-serialize the parts whose text actually changed
+            changed_parts = {}
+            if replacements:
+                plan = (
+                    replacements
+                    if isinstance(replacements, ReplacementPlan)
+                    else ReplacementPlan(replacements)
+                )
+                for name, root in parts.items():
+                    if self._apply_replacements_to_part(root, plan):
+                        changed_parts[name] = etree.tostring(
+                            root, encoding="UTF-8", standalone=True
+                        )
+
+            content = (
+                self._rebuild_archive(archive, changed_parts)
+                if changed_parts
+                else payload
+            )
 
         # Generate random filename
-        random_filename = f"{uuid.uuid4().hex[:12]}.docx"
+        random_filename = f"{secrets.token_hex(6)}.docx"
 
         return AnonymizedAttachment(
             filename=random_filename,
-            content=buffer.getvalue(),
+            content=content,
             maintype="application",
             subtype="vnd.openxmlformats-officedocument.wordprocessingml.document",
         )
 
-    def _extract_all_text(self, document: DocumentType) -> str:
-        """Extract all text from the document for Presidio analysis."""
-        text_parts = []
-
-        # Extract from paragraphs (main body)
-        for paragraph in document.paragraphs:
-            if paragraph.text:
-                text_parts.append(paragraph.text)
-
-        # Extract from tables
-        for table in document.tables:
-            text_parts.extend(self._extract_text_from_table(table))
-
-        # Extract from headers/footers
-        for section in document.sections:
-            for paragraph in section.header.paragraphs:
-                if paragraph.text:
-                    text_parts.append(paragraph.text)
-            for paragraph in section.footer.paragraphs:
-                if paragraph.text:
-                    text_parts.append(paragraph.text)
-
-        return "\n".join(text_parts)
-
-    def _extract_text_from_table(self, table: Table) -> list[str]:
-        """Extract text from a table and any nested tables."""
-        text_parts = []
-        for row in table.rows:
-            for cell in row.cells:
-                for paragraph in cell.paragraphs:
-                    if paragraph.text:
-                        text_parts.append(paragraph.text)
-                # Handle nested tables
-                for nested_table in cell.tables:
-                    text_parts.extend(self._extract_text_from_table(nested_table))
-        return text_parts
-
-    def _apply_replacements_to_document(
-        self, document: DocumentType, replacements: dict[str, str]
-    ) -> None:
-        """Apply replacements to all text elements in the document in a single pass."""
-        if not replacements:
-            return
-
-        # Process all paragraphs (main body)
-        for paragraph in document.paragraphs:
-            self._apply_replacements_to_paragraph(paragraph, replacements)
-
-        # Process all tables
-        for table in document.tables:
-            self._apply_replacements_to_table(table, replacements)
-
-        # Process all sections (headers/footers)
-        for section in document.sections:
-            # Header paragraphs
-            for paragraph in section.header.paragraphs:
-                self._apply_replacements_to_paragraph(paragraph, replacements)
-
-            # Footer paragraphs
-            for paragraph in section.footer.paragraphs:
-                self._apply_replacements_to_paragraph(paragraph, replacements)
-
-    def _apply_replacements_to_paragraph(
-        self, paragraph: Paragraph, replacements: dict[str, str]
-    ) -> None:
-        """Apply replacements to all runs in a paragraph."""
-        for run in paragraph.runs:
-            if run.text:
-                run.text = apply_replacements(run.text, replacements)
-
-    def _apply_replacements_to_table(
-        self, table: Table, replacements: dict[str, str]
-    ) -> None:
-        """Apply replacements to all cells in a table."""
-        for row in table.rows:
-            for cell in row.cells:
-                # Process all paragraphs in the cell
-                for paragraph in cell.paragraphs:
-                    self._apply_replacements_to_paragraph(paragraph, replacements)
-
-                # Process nested tables (tables within cells)
-                for nested_table in cell.tables:
-                    self._apply_replacements_to_table(nested_table, replacements)
+    def _parse_text_parts(self, archive: zipfile.ZipFile) -> dict[str, etree._Element]:
+        """Parse the body, header and footer parts of the package."""
+        # Never resolve entities from untrusted attachments. lxml parsers are
+        # not safe to share between threads, so each call gets its own.
+        parser = etree.XMLParser(resolve_entities=False)
+        return {
+            name: etree.fromstring(archive.read(name), parser)
+            for name in self._text_part_names(archive, parser)
+        }
+
+    def _text_part_names(
+        self, archive: zipfile.ZipFile, parser: etree.XMLParser
+    ) -> list[str]:
+        """Find the text-bearing parts by their declared content type.
+
+        Part names are not fixed (e.g. the body may be ``word/document2.xml``),
+        so they are looked up in ``[Content_Types].xml`` rather than guessed.
+        """
+        content_types = etree.fromstring(archive.read(_CONTENT_TYPES_PART), parser)
+
+        # Part names are case-insensitive; map them onto the archive members
+        members = {name.lower(): name for name in archive.namelist()}
+
+        names = []
+        for override in content_types.iter(_OVERRIDE_TAG):
+            if override.get("ContentType") in _TEXT_PART_CONTENT_TYPES:
+                part_name = unquote(override.get("PartName", "")).lstrip("/")
+                name = members.get(part_name.lower())
+                if name is not None:
+                    names.append(name)
+
+        # Parts without an override take the default for their extension
+        default_extensions = {
+            default.get("Extension", "").lower()
+            for default in content_types.iter(_DEFAULT_TAG)
+            if default.get("ContentType") in _TEXT_PART_CONTENT_TYPES
+        }
+        if default_extensions:
+            overridden = {
+                unquote(override.get("PartName", "")).lstrip("/").lower()
+                for override in content_types.iter(_OVERRIDE_TAG)
+            }
+            for lowered, name in members.items():
+                extension = posixpath.splitext(lowered)[1].lstrip(".")
+                if extension in default_extensions and lowered not in overridden:
+                    names.append(name)
+
+        return names
+
+    def _extract_all_text(self, parts: dict[str, etree._Element]) -> str:
+        """Extract all paragraph text from the parsed parts for Presidio analysis.
+
+        Repeated paragraphs (headers and footers of each section, boilerplate)
+        are analyzed once; replacements apply to every occurrence anyway.
+        """
+        paragraph_texts = (
+            self._paragraph_text(paragraph)
+            for root in parts.values()
+            for paragraph in root.iter(_PARAGRAPH_TAG)
+        )
+        return "\n".join(dict.fromkeys(text for text in paragraph_texts if text))
+
+    def _paragraph_text(self, paragraph: etree._Element) -> str:
+        """Return the text of a paragraph, rendering tabs and breaks as whitespace."""
+        pieces = []
+        for node in paragraph.iter(_TEXT_TAG, _TAB_TAG, _BREAK_TAG):
+            if node.tag == _TEXT_TAG:
+                pieces.append(node.text or "")
+            elif node.tag == _TAB_TAG:
+                pieces.append("\t")
+            else:
+                pieces.append("\n")
+        return "".join(pieces)
+
+    def _apply_replacements_to_part(
+        self, root: etree._Element, replacements: ReplacementPlan
+    ) -> bool:
+        """Apply replacements to every text node of a part.
+
+        Returns:
+            True if any text node was modified
+        """
+        changed = False
+        for node in root.iter(_TEXT_TAG):
+            if node.text:
+                anonymized = apply_replacements(node.text, replacements)
+                if anonymized != node.text:
+                    node.text = anonymized
+                    changed = True
+        return changed
+
+    def _rebuild_archive(
+        self, archive: zipfile.ZipFile, changed_parts: dict[str, bytes]
+    ) -> bytes:
+        """Write a copy of the package with the changed parts substituted."""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as target:
+            for info in archive.infolist():
+                data = changed_parts.get(info.filename)
+                if data is None:
+                    data = archive.read(info)
+                target.writestr(info, data)
+        return buffer.getvalue()
@@ -2,23 +2,51 @@
 
 from __future__ import annotations
 
-import email
+import secrets
 from email import policy
 from email.message import EmailMessage, Message
+from email.parser import BytesFeedParser
+from pathlib import Path
+from typing import BinaryIO
 
 from .docx_processor import DocxProcessor
 from .pdf_processor import PDFProcessor
 from .text_processor import anonymize_text_payload
 from .types import AnonymizedAttachment
-from ..anonymizer import ReplacementProvider, apply_replacements
+from ..anonymizer import ReplacementPlan, ReplacementProvider, apply_replacements
+
+# Size of the chunks fed to the parser when reading from a stream
+_READ_CHUNK_SIZE = 1 << 20
+
+# Transfer encodings whose payload is plain ASCII and can be copied verbatim
+_VERBATIM_ENCODINGS = frozenset({"base64", "quoted-printable", "7bit"})
+
+# Headers that never carry PII; they are neither analyzed nor rewritten. This is
+# deliberately a denylist: addresses also appear in headers such as Return-Path
+# or vendor X- headers, so everything not listed here is still anonymized.
+_NON_PII_HEADERS = frozenset(
+    {
+        # MIME structure
+        "mime-version",
+        "content-type",
+        "content-transfer-encoding",
+        # Machine-generated identifiers; rewriting their addr-spec form as an
+        # email address leaves values the header parser cannot handle
+        "message-id",
+        "in-reply-to",
+        "references",
+        # Signature blob without address fields
+        "arc-seal",
+    }
+)
 
 
 class EmailProcessor:
     """
     Process and anonymize EML files using Presidio:
-    - Email body/headers are analyzed and anonymized
-    - Each attachment (PDF, DOCX) analyzes its own content with Presidio
-    - The same ReplacementProvider instance ensures consistent replacements across all parts
+    - Headers, bodies and attachment text (PDF, DOCX) are analyzed in a single pass
+    - The resulting replacement mapping is applied to every part of the email
+    - Sharing one mapping ensures consistent replacements across all parts
     """
 
     def __init__(self, replacement_provider: ReplacementProvider) -> None:
@@ -26,37 +54,55 @@ class EmailProcessor:
         self._pdf_processor = PDFProcessor(replacement_provider)
         self._docx_processor = DocxProcessor(replacement_provider)
 
-    def anonymize(self, raw_eml: bytes) -> bytes:
-        """Anonymize an email and all its attachments."""
+    def anonymize(self, raw_eml: bytes | BinaryIO) -> bytes:
+        """Anonymize an email and all its attachments.
+
+        Args:
+            raw_eml: The raw email, either as bytes or as a binary stream
+        """
         # Parse the original email
-        original = email.message_from_bytes(raw_eml, policy=policy.default)
+        original = self._parse_message(raw_eml)
 
         # Step 1: Extract all text content from email for replacement mapping
         all_text = self._extract_all_text(original)
 
-        # Step 2: Generate replacement mappings using LLM
+        # Step 2: Generate replacement mappings for the whole email in one call
         replacements = self._replacement_provider(
             all_text, context="Complete email with all attachments"
         )
 
-        # Step 3: Apply replacements to create anonymized email
-        anonymized = self._clone_and_anonymize(original, replacements)
-
+        # Step 3: Apply replacements to create anonymized email, compiling the
+        # mapping once for every header, body and attachment
+        anonymized = self._clone_and_anonymize(original, ReplacementPlan(replacements))
         return anonymized.as_bytes()
 
+    def _parse_message(self, source: bytes | BinaryIO) -> Message:
+        """Parse an email incrementally, reading streams in fixed-size chunks.
+
+        Feeding the parser directly avoids the intermediate copies made by
+        ``email.message_from_bytes`` for messages with large attachments.
+        """
+        parser = BytesFeedParser(policy=policy.default)
+        if isinstance(source, (bytes, bytearray)):
+            parser.feed(source)
+        else:
+            for chunk in iter(lambda: source.read(_READ_CHUNK_SIZE), b""):
+                parser.feed(chunk)
+        return parser.close()
+
     def _extract_all_text(self, message: Message) -> str:
         """Extract all text content from email including headers and attachments."""
         text_parts = []
 
         # Extract headers
         for header, value in message.items():
-            if value:
+            if value and header.lower() not in _NON_PII_HEADERS:
                 text_parts.append(f"{header}: {value}")
 
         # Extract body and attachments
         if message.is_multipart():
             for part in message.iter_parts():
-                text_parts.append(self._extract_part_text(part))
+                self._extract_part_text(part, text_parts)
         else:
             # Simple message with body only
             try:
@@ -66,17 +112,26 @@ class EmailProcessor:
             except Exception:
                 pass
 
-        return "\n\n".join(filter(None, text_parts))
+        # Identical parts (e.g. a forwarded body repeated as an attachment) are
+        # analyzed once; replacements apply to every occurrence anyway
+        return "\n\n".join(dict.fromkeys(text for text in text_parts if text))
+
+    def _extract_part_text(self, part: Message, text_parts: list[str]) -> None:
+        """Append the text of a message part and its subparts to ``text_parts``.
 
-    def _extract_part_text(self, part: Message) -> str:
-        """Extract text from a message part."""
+        Nested multiparts are flattened into the caller's list so the whole
+        email is joined once.
+        """
         if part.is_multipart():
             # Recursively extract from multipart
-            parts = []
             for subpart in part.iter_parts():
-                parts.append(self._extract_part_text(subpart))
-            return "\n".join(filter(None, parts))
+                self._extract_part_text(subpart, text_parts)
+            return
 
+        text_parts.append(self._extract_leaf_text(part))
+
+    def _extract_leaf_text(self, part: Message) -> str:
+        """Extract text from a single non-multipart message part."""
         maintype = part.get_content_maintype()
 
         # Extract text content
@@ -90,13 +145,18 @@ class EmailProcessor:
         filename = part.get_filename()
         if filename:
             try:
-                payload_bytes = part.get_payload(decode=True) or b""
                 lowered = filename.lower()
 
                 # Extract text from PDF
                 if lowered.endswith(".pdf"):
+                    payload_bytes = part.get_payload(decode=True) or b""
                     return self._extract_pdf_text(payload_bytes)
 
+                # Extract text from DOCX
+                if lowered.endswith(".docx") or lowered.endswith(".doc"):
+                    payload_bytes = part.get_payload(decode=True) or b""
+                    return self._docx_processor.extract_text(payload_bytes)
+
                 # For other types, just note the filename
                 return f"Attachment: {filename}"
             except Exception:
@@ -107,21 +167,11 @@ class EmailProcessor:
     def _extract_pdf_text(self, payload: bytes) -> str:
         """Extract text from PDF for replacement mapping generation."""
         try:
-            import fitz
-
-            doc = fitz.open(stream=payload, filetype="pdf")
-            try:
-                text_parts = []
-                for page_num in range(len(doc)):
-                    page = doc[page_num]
-                    text_parts.append(page.get_text())
-                return "\n".join(text_parts)
-            finally:
-                doc.close()
+            return self._pdf_processor.extract_text(payload)
         except Exception:
             return ""
 
-    def _anonymize_html(self, html: str, replacements: dict[str, str]) -> str:
+    def _anonymize_html(self, html: str, replacements: ReplacementPlan) -> str:
         """Anonymize text content within HTML while preserving HTML structure."""
         if not replacements:
             return html
@@ -169,19 +219,25 @@ class EmailProcessor:
             return html
 
     def _clone_and_anonymize(
-        self, message: Message, replacements: dict[str, str]
+        self, message: Message, replacements: ReplacementPlan
     ) -> EmailMessage:
         """Clone message structure and apply replacements."""
         clone = EmailMessage()
 
         # Copy and anonymize headers (skip Content-Type as it's set by make_mixed/set_content)
+        # Repeated values (e.g. several near-identical Received headers) are
+        # only anonymized once per message
+        anonymized_values: dict[str, str] = {}
         for header, value in message.items():
-            if header.lower() == "content-type":
+            lowered = header.lower()
+            if lowered == "content-type":
                 continue
-            anonymized_value = (
-                apply_replacements(value, replacements) if value else value
-            )
-            clone[header] = anonymized_value
+            if lowered in _NON_PII_HEADERS or not value:
+                clone[header] = value
+                continue
+            if value not in anonymized_values:
+                anonymized_values[value] = apply_replacements(value, replacements)
+            clone[header] = anonymized_values[value]
 
         # Process content
         if message.is_multipart():
@@ -231,7 +287,7 @@ class EmailProcessor:
         return clone
 
     def _process_part(
-        self, part: Message, replacements: dict[str, str]
+        self, part: Message, replacements: ReplacementPlan
     ) -> EmailMessage | AnonymizedAttachment:
         """Process a message part (body or attachment) with replacements."""
         if part.is_multipart():
@@ -244,16 +300,13 @@ class EmailProcessor:
         # Handle text parts (only if they have a filename - otherwise they're the body)
         if maintype == "text" and filename:
             try:
-                import uuid
-                from pathlib import Path
-
                 payload = part.get_content()
                 sanitized = apply_replacements(payload, replacements)
                 charset = part.get_content_charset() or "utf-8"
 
                 # Generate random filename, preserve extension
                 ext = Path(filename).suffix or ".txt"
-                random_filename = f"{uuid.uuid4().hex[:12]}{ext}"
+                random_filename = f"{secrets.token_hex(6)}{ext}"
 
                 message = EmailMessage()
                 message.set_content(sanitized, subtype=subtype, charset=charset)
@@ -296,14 +349,24 @@ class EmailProcessor:
 
         # Handle binary attachments (PDF, DOCX, etc.)
         if filename:
-            payload_bytes = part.get_payload(decode=True) or b""
             lowered = filename.lower()
 
             if lowered.endswith(".pdf"):
-                return self._pdf_processor.anonymize(filename, payload_bytes)
+                payload_bytes = part.get_payload(decode=True) or b""
+                return self._pdf_processor.anonymize(
+                    filename, payload_bytes, replacements
+                )
 
             if lowered.endswith(".docx") or lowered.endswith(".doc"):
-                return self._docx_processor.anonymize(filename, payload_bytes)
+                payload_bytes = part.get_payload(decode=True) or b""
+                return self._docx_processor.anonymize(
+                    filename, payload_bytes, replacements
+                )
+
+            # Unsupported binary attachments (images, archives) are copied
+            # over without decoding their payload
+            if maintype != "text":
+                return self._copy_encoded_attachment(part, filename)
 
         # Default: treat as text if possible
         try:
@@ -313,11 +376,8 @@ class EmailProcessor:
             )
         except Exception:
             # If all else fails, return as-is with random filename
-            import uuid
-            from pathlib import Path
-
             ext = Path(filename).suffix if filename else ".bin"
-            random_filename = f"{uuid.uuid4().hex[:12]}{ext}"
+            random_filename = f"{secrets.token_hex(6)}{ext}"
 
             return AnonymizedAttachment(
                 filename=random_filename,
@@ -326,8 +386,53 @@ class EmailProcessor:
                 subtype=subtype or "octet-stream",
             )
 
-
-def anonymize_eml(raw_eml: bytes, replacement_provider: ReplacementProvider) -> bytes:
+    def _copy_encoded_attachment(self, part: Message, filename: str) -> EmailMessage:
+        """Re-attach a part under a random filename, keeping its payload.
+
+        Base64, quoted-printable and 7bit payloads are copied verbatim without
+        being decoded, which avoids materializing large attachments we have no
+        processor for. 8bit and binary payloads cannot be written back as-is,
+        so those are decoded and re-encoded.
+        """
+        ext = Path(filename).suffix or ".bin"
+        random_filename = f"{secrets.token_hex(6)}{ext}"
+
+        # Keep the Content-Type parameters (e.g. charset), except the original name
+        params = {
+            key: value
+            for key, value in part.get_params(failobj=[])[1:]
+            if key.lower() != "name"
+        }
+        disposition = part.get_content_disposition() or "attachment"
+        encoding = part.get("Content-Transfer-Encoding", "7bit").strip().lower()
+
+        message = EmailMessage()
+        if encoding not in _VERBATIM_ENCODINGS:
+            message.set_content(
+                part.get_payload(decode=True) or b"",
+                part.get_content_maintype(),
+                part.get_content_subtype(),
+                disposition=disposition,
+                filename=random_filename,
+                cid=part.get("Content-ID"),
+                params=params,
+            )
+            return message
+
+        message.set_payload(part.get_payload())
+        message["Content-Type"] = part.get_content_type()
+        for key, value in params.items():
+            message.set_param(key, value)
+        if part.get("Content-Transfer-Encoding"):
+            message["Content-Transfer-Encoding"] = part["Content-Transfer-Encoding"]
+        message.add_header("Content-Disposition", disposition, filename=random_filename)
+        if part.get("Content-ID"):
+            message["Content-ID"] = part["Content-ID"]
+        return message
+
+def anonymize_eml(
+    raw_eml: bytes | BinaryIO, replacement_provider: ReplacementProvider
+) -> bytes:
     """Convenience wrapper around EmailProcessor."""
     processor = EmailProcessor(replacement_provider)
     return processor.anonymize(raw_eml)
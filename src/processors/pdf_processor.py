@@ -2,12 +2,28 @@
 
 from __future__ import annotations
 
-import uuid
+import secrets
 
 import fitz  # PyMuPDF
 
 from .types import AnonymizedAttachment
-from ..anonymizer import ReplacementProvider
+from ..anonymizer import ReplacementPlan, ReplacementProvider
+
+# Character-level text extraction without image data, which is never searched
+_RAWDICT_FLAGS = fitz.TEXTFLAGS_RAWDICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+
+def _fold_case(text: str) -> str:
+    """Lower-case text character by character, keeping every offset unchanged.
+
+    PDF text is matched case-insensitively, as ``page.search_for`` does, so
+    e.g. a name also disappears from an upper-case heading.
+    """
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    # A few characters expand when lower-cased; leave those as they are
+    return "".join(char.lower() if len(char.lower()) == 1 else char for char in text)
 
 
 class PDFProcessor:
@@ -16,62 +32,72 @@ class PDFProcessor:
     def __init__(self, replacement_provider: ReplacementProvider) -> None:
         self._replacement_provider = replacement_provider
 
-    def _rectangles_overlap(self, rect1: fitz.Rect, rect2: fitz.Rect, threshold: float = 0.5) -> bool:
-        """Check if two rectangles overlap significantly.
-        
+    def extract_text(self, payload: bytes) -> str:
+        """Extract the text of every page for PII analysis."""
+        doc = fitz.open(stream=payload, filetype="pdf")
+        try:
+            return self._extract_all_text(doc)
+        finally:
+            doc.close()
+
+    def anonymize(
+        self,
+        filename: str,
+        payload: bytes,
+        replacements: dict[str, str] | ReplacementPlan | None = None,
+    ) -> AnonymizedAttachment:
+        """Anonymize PDF content while retaining ALL metadata and structure.
+
         Args:
-            rect1: First rectangle
-            rect2: Second rectangle
-            threshold: Overlap threshold (0.0 to 1.0). If the overlap area is more than
-                      this fraction of the smaller rectangle, consider them overlapping.
-        
-        Returns:
-            True if rectangles overlap significantly
+            filename: Original attachment filename
+            payload: Raw PDF bytes
+            replacements: Precomputed replacement mappings, either as a dict or
+                         an already compiled plan. When omitted, the PDF text
+                         is analyzed with the replacement provider.
         """
-        # Get intersection rectangle
-        intersection = rect1 & rect2  # PyMuPDF's intersection operator
-        
-        if intersection.is_empty:
-            return False
-        
-        # Calculate areas manually (width * height)
-        intersection_area = intersection.width * intersection.height
-        rect1_area = rect1.width * rect1.height
-        rect2_area = rect2.width * rect2.height
-        
-        if rect1_area == 0 or rect2_area == 0:
-            return False
-        
-        # Calculate overlap percentage relative to the smaller rectangle
-        smaller_area = min(rect1_area, rect2_area)
-        overlap_ratio = intersection_area / smaller_area
-        
-        return overlap_ratio > threshold
-
-    def anonymize(self, filename: str, payload: bytes) -> AnonymizedAttachment:
-        """Anonymize PDF content while retaining ALL metadata and structure."""
         # Open the PDF from bytes
         doc = fitz.open(stream=payload, filetype="pdf")
 
-        # Extract all text from the PDF for Presidio analysis
-        full_text = ""
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            full_text += page.get_text()
-
-        # Use Presidio to generate replacements
-        replacements = self._replacement_provider(full_text, context="PDF attachment")
-
         try:
+            # Use Presidio to generate replacements unless the caller already did
+            page_characters = None
+            if replacements is None:
+                # Read each page once; the same characters are analyzed here
+                # and matched against the replacements below
+                page_characters = [self._read_page_characters(page) for page in doc]
+                full_text = "".join(text for text, _ in page_characters)
+                replacements = self._replacement_provider(
+                    full_text, context="PDF attachment"
+                )
+            elif isinstance(replacements, ReplacementPlan):
+                replacements = replacements.replacements
+
+            # Compile the case-folded mapping once for every page
+            plan = ReplacementPlan(
+                {
+                    _fold_case(original): replacement
+                    for original, replacement in replacements.items()
+                }
+            )
+
             # Process each page to apply replacements
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                self._apply_replacements_to_page(page, replacements)
+            if plan:
+                for page in doc:
+                    characters = (
+                        page_characters[page.number]
+                        if page_characters is not None
+                        else self._read_page_characters(page)
+                    )
+                    self._apply_replacements_to_page(page, plan, *characters)
 
             # Save with ALL metadata preserved - use incremental save settings
             anonymized_content = doc.tobytes(
                 garbage=0,  # Don't remove anything
-                deflate=True,  # Compress streams
+                deflate=True,  # Compress uncompressed streams
+                # Both are the defaults, kept explicit: re-encoding image and
+                # font streams costs time on every save
+                deflate_images=False,
+                deflate_fonts=False,
                 clean=False,  # Don't clean - preserves metadata
                 pretty=False,  # Compact output
                 ascii=False,  # Keep binary
@@ -80,7 +106,7 @@ class PDFProcessor:
             )
 
             # Generate random filename
-            random_filename = f"{uuid.uuid4().hex[:12]}.pdf"
+            random_filename = f"{secrets.token_hex(6)}.pdf"
 
             return AnonymizedAttachment(
                 filename=random_filename,
@@ -91,72 +117,95 @@ class PDFProcessor:
         finally:
             doc.close()
 
-    def _apply_replacements_to_page(
-        self, page: fitz.Page, replacements: dict[str, str]
-    ) -> None:
-        """Apply all replacements to a single page using Helvetica font."""
-        if not replacements:
-            return
+    def _extract_all_text(self, doc: fitz.Document) -> str:
+        """Extract all text from the PDF for Presidio analysis."""
+        return "".join(page.get_text() for page in doc)
 
-        # Sort replacements by length (longest first) to avoid partial replacements
-        sorted_replacements = sorted(
-            replacements.items(), key=lambda item: len(item[0]), reverse=True
-        )
+    def _read_page_characters(
+        self, page: fitz.Page
+    ) -> tuple[str, list[tuple[float, float, float, float] | None]]:
+        """Read the text of a page together with the bounding box of each character.
 
-        # Track replacements to make
-        replacements_to_apply = []
-        processed_rects = []  # Track rectangles we've already processed
+        Lines are joined with newlines as in ``get_text()``, so keys spanning a
+        line break still match.
 
-        # For each replacement, find all instances in the text blocks
-        for original, replacement in sorted_replacements:
-            if not original or original == replacement:
-                continue
+        Returns:
+            The page text and a bounding box per character (None at line breaks)
+        """
+        text_parts = []
+        char_boxes = []
+        page_dict = page.get_text("rawdict", flags=_RAWDICT_FLAGS)
+        for block in page_dict["blocks"]:
+            for line in block.get("lines", ()):
+                for span in line["spans"]:
+                    for char in span["chars"]:
+                        text_parts.append(char["c"])
+                        char_boxes.append(char["bbox"])
+                text_parts.append("\n")
+                char_boxes.append(None)
+        return "".join(text_parts), char_boxes
+
+    def _apply_replacements_to_page(
+        self,
+        page: fitz.Page,
+        replacements: ReplacementPlan,
+        page_text: str,
+        char_boxes: list[tuple[float, float, float, float] | None],
+    ) -> None:
+        """Apply all replacements to a single page using Helvetica font.
 
-            # Search for text instances and get their exact positions
-            text_instances = page.search_for(original)
+        Args:
+            page: Page to redact
+            replacements: Plan keyed on case-folded text, see ``_fold_case``
+            page_text: Page text from ``_read_page_characters``
+            char_boxes: Bounding box per character of ``page_text``
+        """
+        folded_text = _fold_case(page_text)
 
-            if not text_instances:
+        # Track replacements to make; matches never overlap, so no
+        # deduplication of their rectangles is needed
+        replacements_to_apply = []
+        for start, end, replacement in replacements.find(folded_text):
+            original = page_text[start:end]
+            if original == replacement:
                 continue
 
-            # For each instance, check if it overlaps with already processed rectangles
-            for rect in text_instances:
-                # Check if this rectangle overlaps significantly with any already processed
-                is_duplicate = False
-                for processed in processed_rects:
-                    if self._rectangles_overlap(rect, processed):
-                        is_duplicate = True
-                        break
-                
-                if not is_duplicate:
-                    replacements_to_apply.append(
-                        {
-                            "rect": rect,
-                            "original": original,
-                            "replacement": replacement,
-                        }
-                    )
-                    processed_rects.append(rect)
+            # One rectangle per line the match covers
+            rects = []
+            rect = None
+            for box in char_boxes[start:end]:
+                if box is None:
+                    rect = None
+                elif rect is None:
+                    rect = fitz.Rect(box)
+                    rects.append(rect)
+                else:
+                    rect.include_rect(box)
+
+            if rects:
+                replacements_to_apply.append((rects, original, replacement))
 
         if not replacements_to_apply:
             return
 
         # First pass: Add redaction annotations to remove original text
-        for item in replacements_to_apply:
-            rect = item["rect"]
-            # Add redaction with white fill to completely cover original text
-            page.add_redact_annot(
-                rect,
-                fill=(1, 1, 1),  # White background to cover original
-            )
+        for rects, _, _ in replacements_to_apply:
+            for rect in rects:
+                # Add redaction with white fill to completely cover original text
+                page.add_redact_annot(
+                    rect,
+                    fill=(1, 1, 1),  # White background to cover original
+                )
 
         # Apply all redactions to remove original text
         page.apply_redactions(images=fitz.PDF_REDACT_IMAGE_NONE)
 
-        # Second pass: Add replacement text on the clean white rectangles
-        for item in replacements_to_apply:
-            rect = item["rect"]
-            replacement = item["replacement"]
-            original = item["original"]
+        # Second pass: Add replacement text on the clean white rectangles,
+        # starting where the original text started. Text drawn this way is
+        # never wrapped or dropped, unlike redaction annotation text, which
+        # is discarded when it does not fit the rectangle.
+        for rects, original, replacement in replacements_to_apply:
+            rect = rects[0]
 
             # Use Helvetica font and calculate size based on rect height
             fontname = "helv"
@@ -171,7 +220,7 @@ class PDFProcessor:
             # Insert text at the rectangle position
             # Adjust y position to align text properly (baseline)
             text_point = fitz.Point(rect.x0, rect.y0 + rect.height * 0.75)
-            
+
             page.insert_text(
                 text_point,
                 replacement,
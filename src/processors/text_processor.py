@@ -2,22 +2,22 @@
 
 from __future__ import annotations
 
-import uuid
+import secrets
 from pathlib import Path
 
 from .types import AnonymizedAttachment
-from ..anonymizer import apply_replacements
+from ..anonymizer import ReplacementPlan, apply_replacements
 
 
 def anonymize_text_payload(
-    name: str, content: str, replacements: dict[str, str]
+    name: str, content: str, replacements: dict[str, str] | ReplacementPlan
 ) -> AnonymizedAttachment:
     """Return an anonymized text attachment with a random filename."""
     sanitized = apply_replacements(content, replacements)
 
     # Generate random filename, preserve extension if available
     ext = Path(name).suffix or ".txt"
-    random_filename = f"{uuid.uuid4().hex[:12]}{ext}"
+    random_filename = f"{secrets.token_hex(6)}{ext}"
 
     return AnonymizedAttachment(
         filename=random_filename,
@@ -0,0 +1,129 @@
+"""Tests for replacement matching and substitution."""
+
+from __future__ import annotations
+
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from src import anonymizer
+from src.anonymizer import (
+    CachedReplacementProvider,
+    PresidioAnonymizer,
+    ReplacementPlan,
+    apply_replacements,
+)
+
+
+def _clear_compiled() -> None:
+    anonymizer._compile_matcher.cache_clear()
+    anonymizer._compile_replacements.cache_clear()
+
+
+@pytest.fixture(params=["ahocorasick", "regex"])
+def backend(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch):
+    """Run a test against both the Aho-Corasick and the regex matcher."""
+    if request.param == "regex":
+        monkeypatch.setattr(anonymizer, "ahocorasick", None)
+    elif anonymizer.ahocorasick is None:
+        pytest.skip("pyahocorasick is not installed")
+    _clear_compiled()
+    yield request.param
+    _clear_compiled()
+
+
+def test_longest_key_wins_at_the_same_position(backend: str) -> None:
+    replacements = {"Matt": "<FIRST_NAME>", "Matthew Booth": "<PERSON>"}
+
+    result = apply_replacements("Matthew Booth and Matt", replacements)
+
+    assert result == "<PERSON> and <FIRST_NAME>"
+
+
+def test_leftmost_match_wins_over_overlapping_keys(backend: str) -> None:
+    result = apply_replacements("abcd", {"bcd": "<B>", "abc": "<A>", "x": "<X>"})
+
+    assert result == "<A>d"
+
+
+def test_inserted_labels_are_not_replaced_again(backend: str) -> None:
+    replacements = {"Alice": "<PERSON>", "PERSON": "<NAME>", "<": "&lt;"}
+
+    assert apply_replacements("Alice <3", replacements) == "<PERSON> &lt;3"
+
+
+def test_find_reports_non_overlapping_matches(backend: str) -> None:
+    plan = ReplacementPlan({"Bob": "<P>", "Bob Jones": "<PERSON>", "555": "<N>"})
+
+    assert plan.find("Bob Jones, Bob, 5555") == [
+        (0, 9, "<PERSON>"),
+        (11, 14, "<P>"),
+        (16, 19, "<N>"),
+    ]
+
+
+def test_empty_inputs_are_returned_unchanged(backend: str) -> None:
+    assert apply_replacements("", {"a": "b"}) == ""
+    assert apply_replacements("text", {}) == "text"
+    assert apply_replacements("text", {"": "x"}) == "text"
+    assert ReplacementPlan({"a": "b"}).find("") == []
+
+
+def test_matcher_backends_agree(monkeypatch: pytest.MonkeyPatch) -> None:
+    if anonymizer.ahocorasick is None:
+        pytest.skip("pyahocorasick is not installed")
+
+    rng = random.Random(1234)
+    cases = []
+    for _ in range(500):
+        keys = {
+            "".join(rng.choice("ab c") for _ in range(rng.randint(1, 4)))
+            for _ in range(rng.randint(2, 6))
+        }
+        replacements = {key: f"<{index}>" for index, key in enumerate(sorted(keys))}
+        text = "".join(rng.choice("ab c") for _ in range(rng.randint(0, 40)))
+        cases.append((text, replacements))
+
+    def run() -> list[str]:
+        _clear_compiled()
+        return [apply_replacements(text, mapping) for text, mapping in cases]
+
+    with_automaton = run()
+    monkeypatch.setattr(anonymizer, "ahocorasick", None)
+    with_regex = run()
+    _clear_compiled()
+
+    assert with_automaton == with_regex
+
+
+def test_cached_provider_reuses_mappings_per_text_and_context() -> None:
+    calls = []
+
+    def provider(text: str, *, context: str | None = None) -> dict[str, str]:
+        calls.append((text, context))
+        return {"Alice": "<PERSON>"}
+
+    cached = CachedReplacementProvider(provider, maxsize=1)
+
+    first = cached("Alice", context="body")
+    first["Alice"] = "mutated"
+    assert cached("Alice", context="body") == {"Alice": "<PERSON>"}
+    cached("Alice", context="header")
+    cached("Alice", context="body")
+
+    assert calls == [("Alice", "body"), ("Alice", "header"), ("Alice", "body")]
+
+
+def test_presidio_keeps_the_last_result_for_repeated_text() -> None:
+    text = "Jordan met Jordan"
+    results = [
+        SimpleNamespace(start=0, end=6, entity_type="PERSON"),
+        SimpleNamespace(start=11, end=17, entity_type="LOCATION"),
+        SimpleNamespace(start=0, end=6, entity_type="NRP"),
+    ]
+    analyzer = SimpleNamespace(analyze=lambda **kwargs: results)
+
+    replacements = PresidioAnonymizer(analyzer=analyzer)(text)
+
+    assert replacements == {"Jordan": "<NRP>"}
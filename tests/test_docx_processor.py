@@ -0,0 +1,94 @@
+"""Tests for DOCX anonymization."""
+
+from __future__ import annotations
+
+import io
+import zipfile
+
+from src.processors.docx_processor import DocxProcessor
+
+_MAIN = (
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"
+)
+_HEADER = "application/vnd.openxmlformats-officedocument.wordprocessingml.header+xml"
+_W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+
+def _no_provider(text: str, *, context: str | None = None) -> dict[str, str]:
+    raise AssertionError("replacements are supplied by the test")
+
+
+def _make_docx(body: str, header: str, main_part: str = "word/document.xml") -> bytes:
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        f'<Override PartName="/{main_part}" ContentType="{_MAIN}"/>'
+        f'<Override PartName="/word/header1.xml" ContentType="{_HEADER}"/>'
+        "</Types>"
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", content_types)
+        archive.writestr(
+            main_part,
+            f"<w:document {_W}><w:body><w:p>"
+            f"<w:r><w:t>{body}</w:t></w:r><w:r><w:tab/><w:t>end</w:t></w:r>"
+            "</w:p></w:body></w:document>",
+        )
+        archive.writestr(
+            "word/header1.xml",
+            f"<w:hdr {_W}><w:p><w:r><w:t>{header}</w:t></w:r></w:p></w:hdr>",
+        )
+        archive.writestr("word/styles.xml", f"<w:styles {_W}/>")
+    return buffer.getvalue()
+
+
+def test_extract_text_reads_body_and_header() -> None:
+    payload = _make_docx("Call Alice Smith", "Alice Smith Ltd")
+
+    text = DocxProcessor(_no_provider).extract_text(payload)
+
+    assert text.splitlines() == ["Call Alice Smith\tend", "Alice Smith Ltd"]
+
+
+def test_anonymize_rewrites_text_and_keeps_other_parts() -> None:
+    payload = _make_docx("Call Alice Smith", "Alice Smith Ltd")
+
+    result = DocxProcessor(_no_provider).anonymize(
+        "cv.docx", payload, {"Alice Smith": "<PERSON>"}
+    )
+
+    processor = DocxProcessor(_no_provider)
+    assert processor.extract_text(result.content).splitlines() == [
+        "Call <PERSON>\tend",
+        "<PERSON> Ltd",
+    ]
+    with zipfile.ZipFile(io.BytesIO(payload)) as original, zipfile.ZipFile(
+        io.BytesIO(result.content)
+    ) as anonymized:
+        assert anonymized.namelist() == original.namelist()
+        assert anonymized.read("word/styles.xml") == original.read("word/styles.xml")
+    assert result.filename.endswith(".docx")
+
+
+def test_anonymize_without_matches_returns_payload_unchanged() -> None:
+    payload = _make_docx("Nothing to see", "Header")
+
+    result = DocxProcessor(_no_provider).anonymize(
+        "cv.docx", payload, {"Alice Smith": "<PERSON>"}
+    )
+
+    assert result.content == payload
+
+
+def test_main_part_is_found_through_content_types() -> None:
+    payload = _make_docx("Call Alice Smith", "Header", main_part="word/document2.xml")
+
+    result = DocxProcessor(_no_provider).anonymize(
+        "cv.docx", payload, {"Alice Smith": "<PERSON>"}
+    )
+
+    text = DocxProcessor(_no_provider).extract_text(result.content)
+    assert "Alice Smith" not in text
+    assert "Call <PERSON>" in text
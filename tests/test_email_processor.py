@@ -0,0 +1,130 @@
+"""Tests for whole-email anonymization."""
+
+from __future__ import annotations
+
+import io
+import re
+from email import message_from_bytes, policy
+from email.message import EmailMessage
+
+from src.processors.email_processor import EmailProcessor
+
+_PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 4
+_PII = re.compile(r"Alice Smith|[\w.]+@example\.com")
+
+
+class _StubProvider:
+    """Replace names and example.com addresses, recording what was analyzed."""
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, str | None]] = []
+
+    def __call__(self, text: str, *, context: str | None = None) -> dict[str, str]:
+        self.calls.append((text, context))
+        return {
+            match: "<EMAIL_ADDRESS>" if "@" in match else "<PERSON>"
+            for match in _PII.findall(text)
+        }
+
+
+def _make_email() -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = "Alice Smith <alice@example.com>"
+    message["To"] = "bob@example.com"
+    message["Subject"] = "Photos from Alice Smith"
+    # addr-spec form: rewriting it as an address breaks the header parser
+    message["Message-ID"] = "<1234.alice@example.com>"
+    message["In-Reply-To"] = "<999.bob@example.com>"
+    message.set_content(
+        "Hi Bob,\nhere are the photos.\nAlice Smith\nalice@example.com\n"
+    )
+    message.add_attachment(_PNG, maintype="image", subtype="png", filename="alice.png")
+    return message
+
+
+def test_email_headers_and_body() -> None:
+    provider = _StubProvider()
+
+    result = EmailProcessor(provider).anonymize(_make_email().as_bytes())
+
+    anonymized = message_from_bytes(result, policy=policy.default)
+    # Raw header values, before address parsing
+    headers = dict(message_from_bytes(result).items())
+
+    # One analyzer call covering the whole email
+    assert len(provider.calls) == 1
+    analyzed, _ = provider.calls[0]
+    assert "Alice Smith" in analyzed
+
+    assert headers["From"] == "<PERSON> <<EMAIL_ADDRESS>>"
+    assert headers["To"] == "<EMAIL_ADDRESS>"
+    assert headers["Subject"] == "Photos from <PERSON>"
+
+    body = anonymized.get_body(preferencelist=("plain",)).get_content()
+    assert "Alice Smith" not in body
+    assert "alice@example.com" not in body
+    assert "<PERSON>\n<EMAIL_ADDRESS>" in body
+
+
+def test_message_identifiers_are_left_alone() -> None:
+    provider = _StubProvider()
+
+    result = EmailProcessor(provider).anonymize(_make_email().as_bytes())
+
+    headers = dict(message_from_bytes(result).items())
+    analyzed, _ = provider.calls[0]
+    assert "1234.alice@example.com" not in analyzed
+    assert headers["Message-ID"] == "<1234.alice@example.com>"
+    assert headers["In-Reply-To"] == "<999.bob@example.com>"
+
+
+def test_streamed_input_matches_bytes_input() -> None:
+    raw = _make_email().as_bytes()
+
+    from_bytes = message_from_bytes(EmailProcessor(_StubProvider()).anonymize(raw))
+    from_stream = message_from_bytes(
+        EmailProcessor(_StubProvider()).anonymize(io.BytesIO(raw))
+    )
+
+    assert from_stream["Subject"] == from_bytes["Subject"]
+    assert (
+        from_stream.get_payload(0).get_payload()
+        == from_bytes.get_payload(0).get_payload()
+    )
+
+
+def test_image_attachment_is_copied_under_a_random_name() -> None:
+    result = EmailProcessor(_StubProvider()).anonymize(_make_email().as_bytes())
+
+    anonymized = message_from_bytes(result, policy=policy.default)
+    (attachment,) = anonymized.iter_attachments()
+    assert attachment.get_content_type() == "image/png"
+    assert attachment["Content-Transfer-Encoding"] == "base64"
+    assert attachment.get_payload(decode=True) == _PNG
+    assert attachment.get_filename() != "alice.png"
+    assert attachment.get_filename().endswith(".png")
+
+
+def test_8bit_attachment_is_re_encoded() -> None:
+    data = b"\xff\xfe\x00binary\xe9data"
+    message = _make_email()
+    message.add_attachment(
+        data,
+        maintype="application",
+        subtype="octet-stream",
+        cte="8bit",
+        filename="alice.bin",
+        params={"charset": "latin-1"},
+    )
+    raw = message.as_bytes()
+    assert data in raw
+
+    result = EmailProcessor(_StubProvider()).anonymize(raw)
+
+    anonymized = message_from_bytes(result, policy=policy.default)
+    _, attachment = anonymized.iter_attachments()
+    assert attachment.get_content_type() == "application/octet-stream"
+    assert attachment.get_param("charset") == "latin-1"
+    assert attachment.get_payload(decode=True) == data
+    assert attachment.get_filename() != "alice.bin"
+    assert attachment.get_filename().endswith(".bin")
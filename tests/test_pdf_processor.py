@@ -0,0 +1,89 @@
+"""Tests for PDF redaction."""
+
+from __future__ import annotations
+
+import fitz
+
+from src.processors.pdf_processor import PDFProcessor
+
+
+def _no_provider(text: str, *, context: str | None = None) -> dict[str, str]:
+    raise AssertionError("replacements are supplied by the test")
+
+
+def _make_pdf(*lines: str) -> bytes:
+    doc = fitz.open()
+    page = doc.new_page()
+    for index, line in enumerate(lines):
+        page.insert_text((72, 72 + 20 * index), line, fontname="helv", fontsize=11)
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+def _page_text(content: bytes) -> str:
+    doc = fitz.open(stream=content, filetype="pdf")
+    try:
+        return "".join(page.get_text() for page in doc)
+    finally:
+        doc.close()
+
+
+def test_labels_wider_than_the_match_are_drawn_whole() -> None:
+    payload = _make_pdf("Ask Al on 555-1234 or a@b.io today")
+    replacements = {
+        "Al": "<PERSON>",
+        "555-1234": "<PHONE_NUMBER>",
+        "a@b.io": "<EMAIL_ADDRESS>",
+    }
+
+    result = PDFProcessor(_no_provider).anonymize("x.pdf", payload, replacements)
+
+    lines = _page_text(result.content).splitlines()
+    for label in replacements.values():
+        assert label in lines
+    text = "\n".join(lines)
+    for original in ("555-1234", "a@b.io", " Al "):
+        assert original not in text
+
+
+def test_matching_ignores_case_like_search_for() -> None:
+    payload = _make_pdf("Invoice for Alice Smith", "ALICE SMITH LTD", "Total 10")
+
+    result = PDFProcessor(_no_provider).anonymize(
+        "x.pdf", payload, {"Alice Smith": "<PERSON>"}
+    )
+
+    text = _page_text(result.content)
+    assert "alice" not in text.lower()
+    assert text.count("<PERSON>") == 2
+    assert "Total 10" in text
+
+
+def test_anonymize_without_matches_keeps_the_text() -> None:
+    payload = _make_pdf("Nothing personal here")
+
+    result = PDFProcessor(_no_provider).anonymize(
+        "x.pdf", payload, {"Alice Smith": "<PERSON>"}
+    )
+
+    assert _page_text(result.content) == _page_text(payload)
+
+
+def test_anonymize_analyzes_and_redacts_in_one_read() -> None:
+    payload = _make_pdf("Invoice for Alice Smith", "Total 10")
+    calls = []
+
+    def provider(text: str, *, context: str | None = None) -> dict[str, str]:
+        calls.append(text)
+        return {"Alice Smith": "<PERSON>"}
+
+    result = PDFProcessor(provider).anonymize("invoice.pdf", payload)
+
+    assert len(calls) == 1
+    assert "Invoice for Alice Smith" in calls[0]
+    text = _page_text(result.content)
+    assert "Alice Smith" not in text
+    assert "<PERSON>" in text
+    assert result.filename.endswith(".pdf")
+    assert result.filename != "invoice.pdf"